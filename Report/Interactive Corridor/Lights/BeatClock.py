@@ -0,0 +1,16 @@
+class BeatClock:
+    # Maps a time in seconds onto the musical grid of a track: which bar,
+    # which beat in the bar and how far (0-1) through that beat. Callers
+    # pass the frame clock's time, so it follows FrameClock pacing.
+    def __init__(self, bpm, beats_per_bar=4):
+        self.bpm = bpm
+        self.beat_duration = 60.0 / bpm
+        self.beats_per_bar = beats_per_bar
+
+    def at(self, t):
+        beats = t / self.beat_duration
+        # Frame times are multiples of a fraction of a beat; the epsilon
+        # keeps a frame that lands exactly on a beat from rounding back.
+        whole = int(beats + 1e-9)
+        bar, beat = divmod(whole, self.beats_per_bar)
+        return bar, beat, max(0.0, beats - whole)
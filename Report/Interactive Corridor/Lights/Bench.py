@@ -0,0 +1,179 @@
+import os, sys
+
+# Effects render into SimStrip, so the benchmark runs on any machine.
+os.environ["LIGHTS_SIM"] = "1"
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from Strip import PixelStrip
+from Framebuffer import FrameBuffer
+import FrameClock
+import numpy as np
+import argparse, importlib, json, time, tracemalloc
+
+LONG = 3600.0
+
+
+# name -> (tier module, constants to override, call). Durations are long
+# and the run is cut off after the requested number of frames.
+EFFECTS = {
+    # render_spin() itself rather than spin_both(), which only plays back
+    # the cached render and would write a cache file for every LED count.
+    "spin_reel": ("Prologue", {},
+                  lambda m, s1, s2: m.render_spin(m.LED_COUNT, m.SPIN_DURATION, m.SPIN_RATE, m.SPIN_FRAME_TIME)),
+    "jackpot_flash": ("Prologue", {}, lambda m, s1, s2: m.jackpot_flash(s1, s2)),
+    "fire_wipe": ("Epic", {}, lambda m, s1, s2: m.fire_wipe(s1, s2)),
+    "disco_ball": ("Uncommon", {"FADE_OUT_START": LONG},
+                   lambda m, s1, s2: m.disco_ball(s1, s2, duration=LONG)),
+    "neon_breathing_groups": ("Rare", {},
+                              lambda m, s1, s2: m.run_neon_breathing_groups(s1, s2, duration=LONG)),
+    "club_129bpm": ("Legendary", {},
+                    lambda m, s1, s2: m.club_129bpm_effect(s1, s2, duration=LONG)),
+}
+
+
+# Where the probe goes: strip 1's send() unless the effect has no strips.
+PROBES = {
+    "spin_reel": lambda m, s1: (m, "spin_step"),
+}
+
+
+class Probe:
+    # Wraps a call made once per frame, strip 1's send() by default, so
+    # each call marks the end of one frame whether or not the transfer is
+    # skipped. Stops the tier through its `running` flag once enough
+    # frames have been seen.
+    def __init__(self, target, name, module, frames, trace):
+        self.call = getattr(target, name)
+        self.module = module
+        self.frames = frames
+        self.trace = trace
+        self.times = []
+        self.peaks = []
+        self.last = time.perf_counter()
+        setattr(target, name, self)
+
+    def __call__(self, *args):
+        if self.trace:
+            # Bytes allocated above the frame's starting point at its peak:
+            # the transient memory the frame needed, not a count of
+            # allocations.
+            current, peak = tracemalloc.get_traced_memory()
+            self.peaks.append(peak - current)
+            tracemalloc.reset_peak()
+
+        now = time.perf_counter()
+        self.times.append(now - self.last)
+        self.last = now
+
+        if len(self.times) >= self.frames:
+            self.module.running = False
+        return self.call(*args)
+
+
+def run_effect(name, led_count, frames, trace=False):
+    module_name, overrides, call = EFFECTS[name]
+    m = importlib.import_module(module_name)
+
+    m.LED_COUNT = led_count
+    if module_name == "Prologue":
+        # The spin and the flashes have a fixed length; stretch them to
+        # cover the requested frames.
+        m.SPIN_DURATION = (frames + 1) * m.SPIN_FRAME_TIME
+        m.FLASHES = frames // 2
+    for key, value in overrides.items():
+        setattr(m, key, value)
+
+    s1 = FrameBuffer(PixelStrip(led_count, 18, channel=0))
+    s2 = FrameBuffer(PixelStrip(led_count, 19, channel=1))
+    target, attr = PROBES.get(name, lambda m, s1: (s1, "send"))(m, s1)
+    probe = Probe(target, attr, m, frames, trace)
+
+    m.running = True
+    if trace:
+        tracemalloc.start()
+    cpu = time.process_time()
+    try:
+        call(m, s1, s2)
+    finally:
+        cpu = time.process_time() - cpu
+        if trace:
+            tracemalloc.stop()
+        m.running = True
+        setattr(target, attr, probe.call)
+    return probe, cpu
+
+
+def measure(name, led_count, frames):
+    probe, cpu = run_effect(name, led_count, frames)
+    # Allocation tracing slows every frame down, so it gets its own pass.
+    traced, _ = run_effect(name, led_count, frames, trace=True)
+
+    # The first interval covers setup before the first frame.
+    t = np.array(probe.times[1:]) * 1000
+    n = len(probe.times)
+    return {
+        "effect": name,
+        "led_count": led_count,
+        "frames": n,
+        "fps": 1000.0 / t.mean(),
+        "p50_ms": float(np.percentile(t, 50)),
+        "p95_ms": float(np.percentile(t, 95)),
+        "p99_ms": float(np.percentile(t, 99)),
+        "cpu_ms": cpu * 1000 / n,
+        "peak_kb": float(np.mean(traced.peaks[1:])) / 1024,
+    }
+
+
+def compare(results, baseline, threshold):
+    # A result regresses when it is more than `threshold` (a fraction)
+    # slower or needs more transient memory than the matching baseline
+    # entry.
+    base = {(r["effect"], r["led_count"]): r for r in baseline}
+    regressions = []
+    for r in results:
+        b = base.get((r["effect"], r["led_count"]))
+        if b is None:
+            continue
+        for key in ("p50_ms", "p95_ms", "cpu_ms", "peak_kb"):
+            if key in b and r[key] > b[key] * (1 + threshold) and r[key] - b[key] > 0.01:
+                regressions.append(f"{r['effect']} @ {r['led_count']}: {key} "
+                                   f"{b[key]:.3f} -> {r[key]:.3f}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the tier effects on SimStrip.")
+    parser.add_argument("effects", nargs="*", default=list(EFFECTS), help="effects to run")
+    parser.add_argument("--counts", default="400,1000,5000", help="comma separated LED counts")
+    parser.add_argument("--frames", type=int, default=300)
+    parser.add_argument("--out", help="write results as JSON")
+    parser.add_argument("--compare", help="baseline JSON to check for regressions")
+    parser.add_argument("--threshold", type=float, default=0.10)
+    args = parser.parse_args()
+
+    FrameClock.PACED = False
+    results = []
+    for name in args.effects:
+        for led_count in map(int, args.counts.split(",")):
+            r = measure(name, led_count, args.frames)
+            results.append(r)
+            print(f"[BENCH] {name:<22} {led_count:>5} LEDs: {r['fps']:8.1f} fps  "
+                  f"p50 {r['p50_ms']:.3f}  p95 {r['p95_ms']:.3f}  p99 {r['p99_ms']:.3f} ms  "
+                  f"cpu {r['cpu_ms']:.3f} ms  peak {r['peak_kb']:.1f} KB")
+
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(results, f, indent=2)
+
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(results, json.load(f), args.threshold)
+        for line in regressions:
+            print(f"[BENCH] REGRESSION {line}")
+        if regressions:
+            sys.exit(1)
+        print("[BENCH] No regressions")
+
+
+if __name__ == "__main__":
+    main()
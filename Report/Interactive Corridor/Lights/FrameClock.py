@@ -0,0 +1,104 @@
+import Profile
+import threading, time
+
+totals = {"frames": 0, "dropped": 0, "late": 0}
+
+# Bench.py and Render.py turn pacing off to render frames back to back.
+# Time is then virtual: sleep() advances it instead of waiting, so effects
+# see the same frame times as a real run and no frame is ever skipped.
+PACED = True
+virtual = {"now": 0.0}
+
+# Every sleep waits on this event, so interrupt() wakes all clocks at once
+# and a stopped show notices within the frame it is in.
+_wake = threading.Event()
+
+
+def interrupt():
+    _wake.set()
+
+
+def resume():
+    _wake.clear()
+
+
+def now():
+    return time.monotonic() if PACED else virtual["now"]
+
+
+def sleep(seconds):
+    # time.sleep() that returns early on interrupt().
+    if not PACED:
+        virtual["now"] += max(0.0, seconds)
+        return
+    t = Profile.stamp()
+    _wake.wait(seconds)
+    Profile.add(Profile.SLEEP, t)
+
+
+def reset_totals():
+    for key in totals:
+        totals[key] = 0
+
+
+def report(name):
+    print(f"[CLOCK] {name}: {totals['frames']} frames, "
+          f"{totals['dropped']} dropped, {totals['late']} late")
+
+
+class FrameClock:
+    # Paces a loop against absolute deadlines start + k * period instead of
+    # sleeping a fixed time after each show(), so render time does not
+    # stretch the effect. When a frame overruns its deadline the clock jumps
+    # ahead to the next frame that can still be met; `steps` tells the loop
+    # how many nominal frames passed so stateful effects can catch up.
+    def __init__(self, period, duration=None, frames=None, running=lambda: True):
+        self.period = period
+        if frames is None and duration is not None:
+            frames = max(1, round(duration / period))
+        self.frames = frames
+        self.running = running
+        self.start = now()
+        self.frame = 0
+        self.steps = 1
+        self.dropped = 0
+        self.late = 0
+        Profile.begin_frame()
+
+    @property
+    def t(self):
+        return self.frame * self.period
+
+    def deadline(self, frame):
+        return self.start + frame * self.period
+
+    def __iter__(self):
+        while self.running() and (self.frames is None or self.frame < self.frames):
+            yield self.frame
+            totals["frames"] += 1
+            self.wait()
+            Profile.end_frame()
+
+    def wait(self):
+        next_frame = self.frame + 1
+        lag = now() - self.deadline(next_frame)
+
+        if lag <= 0:
+            sleep(-lag)
+        else:
+            missed = int(lag / self.period)
+            if missed:
+                self.dropped += missed
+                totals["dropped"] += missed
+            self.late += 1
+            totals["late"] += 1
+            next_frame += missed
+
+        self.steps = next_frame - self.frame
+        self.frame = next_frame
+
+    def at(self, offset):
+        # Sleep until `offset` seconds into the current frame.
+        delay = self.deadline(self.frame) + offset - now()
+        if delay > 0:
+            sleep(delay)
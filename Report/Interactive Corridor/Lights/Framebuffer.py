@@ -0,0 +1,161 @@
+import FrameClock
+import Profile
+import Strip
+import numpy as np
+
+totals = {"transfers": 0, "skipped": 0, "saved": 0.0}
+
+
+def reset_totals():
+    for key in totals:
+        totals[key] = 0
+
+
+def report(name):
+    print(f"[OUTPUT] {name}: {totals['transfers']} transfers, {totals['skipped']} skipped, "
+          f"{totals['saved'] * 1000:.0f} ms of bus time saved")
+
+
+def pack(pixels):
+    p = pixels.astype(np.uint32)
+    return (p[..., 0] << 16) | (p[..., 1] << 8) | p[..., 2]
+
+
+def unpack(colors):
+    c = np.asarray(colors, dtype=np.uint32)
+    out = np.empty(c.shape + (3,), dtype=np.uint8)
+    out[..., 0] = (c >> 16) & 0xFF
+    out[..., 1] = (c >> 8) & 0xFF
+    out[..., 2] = c & 0xFF
+    return out
+
+
+def decay(strips, factor):
+    for strip in strips:
+        strip.scale(factor)
+
+
+class FrameBuffer:
+    # `pixels` is the authoritative copy of what the strip shows. Effects
+    # read and modify it directly and never decode getPixelColor() values
+    # back out of the driver buffer.
+    def __init__(self, strip):
+        self.strip = strip
+        self.count = strip.numPixels()
+        self.pixels = np.zeros((self.count, 3), dtype=np.uint8)
+        self.scratch = np.empty((self.count, 3), dtype=np.uint32)
+        self.on_show = None
+        self.brightness = strip.getBrightness()
+        # False for a logical channel no physical strip reads.
+        self.used = getattr(strip, "used", True)
+        self.sent = None
+        self.sent_brightness = None
+        self.transfers = 0
+        self.skipped = 0
+        self.held = False
+        self.fade_from = None
+        self.fade_start = None
+        self.fade_window = 0.0
+
+    def numPixels(self):
+        return self.count
+
+    def setBrightness(self, brightness):
+        self.brightness = brightness
+        self.strip.setBrightness(brightness)
+
+    def fill(self, color):
+        self.pixels[:] = color
+
+    def clear(self):
+        self.pixels.fill(0)
+
+    def scale(self, factor):
+        # Q8 fixed-point multiply in place; factors above 1 saturate at 255.
+        q = np.uint32(max(0, int(factor * 256 + 0.5)))
+        np.multiply(self.pixels, q, out=self.scratch)
+        np.right_shift(self.scratch, 8, out=self.scratch)
+        np.minimum(self.scratch, 255, out=self.scratch)
+        np.copyto(self.pixels, self.scratch, casting="unsafe")
+
+    def show(self):
+        if not self.used:
+            return
+        t = Profile.stamp()
+        colors = pack(self.pixels)
+        Profile.add(Profile.PACK, t)
+        self.send(colors)
+
+    def show_packed(self, colors):
+        # Send an already packed uint32 frame (e.g. a cached render)
+        # without touching self.pixels.
+        self.send(colors)
+
+    def send(self, colors):
+        if self.held or not self.used:
+            return
+        if self.fade_from is not None:
+            colors = self.blend(colors)
+
+        # A frame identical to the last one sent, at the same brightness,
+        # is already on the LEDs, so its transfer is skipped.
+        if (self.sent is not None and self.brightness == self.sent_brightness
+                and np.array_equal(colors, self.sent)):
+            self.skipped += 1
+            totals["skipped"] += 1
+            totals["saved"] += self.count * Strip.LED_WIRE_TIME + Strip.RESET_TIME
+            if hasattr(self.strip, "publish"):
+                self.strip.publish()
+            return
+
+        t = Profile.stamp()
+        self.write(colors)
+        Profile.add(Profile.PACK, t)
+        self.sent = np.array(colors, dtype=np.uint32)
+        self.sent_brightness = self.brightness
+        self.transfer()
+
+    def hold(self):
+        # Freeze the LEDs on the frame they show now; sends are dropped
+        # until crossfade() releases the buffer.
+        self.held = True
+
+    def crossfade(self, window, gain=1.0):
+        # Release a held buffer and fade from the frame on the LEDs into
+        # whatever is sent over the next `window` seconds. The fade clock
+        # starts at the first send. `gain` rescales the old frame when the
+        # strip brightness changes with it.
+        self.held = False
+        self.fade_from = None
+        if self.sent is not None and window > 0:
+            self.fade_from = np.minimum(unpack(self.sent) * gain, 255).astype(np.float32)
+            self.fade_start = None
+            self.fade_window = window
+
+    def blend(self, colors):
+        now = FrameClock.now()
+        if self.fade_start is None:
+            self.fade_start = now
+        alpha = (now - self.fade_start) / self.fade_window
+        if alpha >= 1.0:
+            self.fade_from = None
+            return colors
+
+        mixed = self.fade_from + (unpack(colors) - self.fade_from) * alpha
+        return pack(mixed.astype(np.uint8))
+
+    def write(self, colors):
+        # The whole frame goes into the driver buffer as one copy here
+        # (Strip.write), not as setPixelColor() calls from the effect loop.
+        Strip.write(self.strip, colors)
+
+    def transfer(self):
+        t = Profile.stamp()
+        self.strip.show()
+        Profile.add(Profile.TRANSFER, t)
+        self.transfers += 1
+        totals["transfers"] += 1
+
+        if self.on_show is not None:
+            callback, self.on_show = self.on_show, None
+            callback()
@@ -0,0 +1,26 @@
+import numpy as np
+
+
+def coords(count, reverse=False, center=False):
+    # Distance of each LED along the direction the front travels. A
+    # centre-out front measures from the middle LED towards both ends.
+    x = np.arange(count, dtype=np.float32)
+    if center:
+        return np.abs(x - count // 2)
+    if reverse:
+        return count - 1 - x
+    return x
+
+
+def front(x, pos, width=1.0, tail=1.0):
+    # Brightness 0-1 of the LEDs at `x` for a front at `pos`. LEDs the front
+    # has passed are lit, the next `width` LEDs ramp down to dark, and a
+    # fractional `pos` lands between two LEDs instead of snapping to one.
+    # `tail` < 1 dims passed LEDs by that factor per LED behind the front.
+    # `pos` may be an array of frame positions; the result is then one row
+    # of brightness per position, with no per-frame Python loop.
+    d = np.asarray(pos, dtype=np.float32)[..., None] - x
+    level = np.clip(d / width + 1.0, 0.0, 1.0)
+    if tail != 1.0:
+        level *= tail ** np.maximum(d, 0.0)
+    return level
@@ -0,0 +1,35 @@
+import Motion
+import numpy as np
+
+
+class Groups:
+    # Pixels mapped onto a small number of groups. Per-group state (base
+    # colour, omega, phase) lives in arrays, so an effect works out every
+    # group's colour in one vectorised step and `expand` fans the result
+    # out to pixels through the precomputed pixel -> group index map.
+    def __init__(self, index):
+        self.index = np.asarray(index)
+        self.count = len(self.index)
+        self.n = int(self.index.max()) + 1
+        self.base = np.zeros((self.n, 3), dtype=np.float32)
+        self.omega = np.zeros(self.n)
+        self.phase = np.zeros(self.n)
+
+    @classmethod
+    def uniform(cls, count, size):
+        return cls(np.arange(count) // size)
+
+    def breathe(self, t):
+        return 0.5 * (1.0 + np.sin(self.omega * t + self.phase))
+
+    def colors(self, factor):
+        return (self.base * np.asarray(factor)[:, None]).astype(np.uint8)
+
+    def expand(self, group_colors, out, offset=0):
+        # `offset` rotates the whole layout along the strip; a fractional
+        # offset blends the two LEDs around each edge.
+        colors = np.asarray(group_colors)[self.index]
+        if offset:
+            return Motion.shift(colors, offset, out)
+        out[:] = colors
+        return out
@@ -1,73 +1,197 @@
 from pythonosc.dispatcher import Dispatcher
 from pythonosc import osc_server
-import subprocess
-import os
+from pythonosc.osc_message_builder import OscMessageBuilder
+import socket
+import threading
+import time
 import sys
+import os
 
 print("OSC SERVER PYTHON:", sys.executable)
 
-ENV_PYTHON = "/home/pi/EGL314/bin/python"
 BASE_DIR = "/home/pi/EGL314"
-
-child_procs = {}
-
-
-def run_script(script_name):
-    script_path = os.path.join(BASE_DIR, script_name)
-    print(f"[OSC] Launching: {script_path}")
-
-    old = child_procs.get(script_name)
-    if old and old.poll() is None:
-        print(f"[OSC] Terminating previous instance of {script_name}...")
-        try:
-            old.terminate()
-        except Exception as e:
-            print(f"[OSC] Error terminating old process: {e}")
-
-    proc = subprocess.Popen(
-        [ENV_PYTHON, script_path],
-        stdout=subprocess.DEVNULL,
-        stderr=subprocess.DEVNULL,
-    )
-    child_procs[script_name] = proc
-
-
-def run_python_1(addr, *args):
-    run_script("common.py")
-
-def run_python_2(addr, *args):
-    run_script("Uncommon.py")
-
-def run_python_3(addr, *args):
-    run_script("Rare.py")
-
-def run_python_4(addr, *args):
-    run_script("Epic.py")
-
-def run_python_5(addr, *args):
-    run_script("Legendary.py")
-
-
-dispatcher = Dispatcher()
-dispatcher.map("/run/python1", run_python_1)
-dispatcher.map("/run/python2", run_python_2)
-dispatcher.map("/run/python3", run_python_3)
-dispatcher.map("/run/python4", run_python_4)
-dispatcher.map("/run/python5", run_python_5)
-
-
-def cleanup_children():
-    print("[OSC] Cleaning up children...")
-    for name, proc in child_procs.items():
-        if proc.poll() is None:
-            print(f"[OSC]  - Terminating {name} (pid {proc.pid})...")
-            try:
-                proc.terminate()
-            except Exception as e:
-                print(f"[OSC]  ! Error terminating {name}: {e}")
+sys.path.insert(0, BASE_DIR)
+
+import FrameClock
+import Framebuffer
+import Profile
+import Output
+import Show
+import Stream
+
+# Tiers come from shows.json; a new tier is a new entry there.
+TIERS = {plan.osc: plan for plan in Show.load().values()}
+
+# LIGHTS_STREAM=host,host... renders here and streams the frames to the
+# Stream.py receivers on those Pis instead of driving local strips.
+STREAM_HOSTS = os.environ.get("LIGHTS_STREAM")
+
+# LIGHTS_OUTPUT=process moves the strip transfers into a separate output
+# process, so the next frame renders while the current one is on the wire.
+output = None
+
+if STREAM_HOSTS:
+    fb1, fb2 = Stream.open_buffers(STREAM_HOSTS.split(","))
+elif os.environ.get("LIGHTS_OUTPUT") == "process":
+    output = Output.OutputProcess()
+    fb1, fb2 = output.buffers
+else:
+    fb1, fb2 = Show.open_strips()
+
+show_lock = threading.Lock()
+current = {"tier": None, "thread": None}
+handoff = {"count": 0, "worst_ms": 0.0}
+
+# Clock sync with the sensor Pi: it pings over this OSC port and gets its
+# start reports back on the address the last ping came from.
+sync_sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+sensor = {"address": None}
+
+
+
+def send_osc(target, address, *args):
+    # Times go out as doubles; a 32-bit OSC float cannot hold them.
+    builder = OscMessageBuilder(address=address)
+    for arg in args:
+        builder.add_arg(arg, arg_type="d" if isinstance(arg, float) else None)
+    sync_sock.sendto(builder.build().dgram, target)
+
+
+def stop_current():
+    tier = current["tier"]
+    thread = current["thread"]
+    if thread is None or not thread.is_alive():
+        return
+
+    # Freeze the LEDs on the current frame first, so nothing the old show
+    # draws while it winds down reaches the strips; the next tier
+    # crossfades out of that frame.
+    start = time.monotonic()
+    fb1.hold()
+    fb2.hold()
+    tier.stop()
+    thread.join()
+
+    stop_ms = (time.monotonic() - start) * 1000.0
+    handoff["count"] += 1
+    handoff["worst_ms"] = max(handoff["worst_ms"], stop_ms)
+    print(f"[OSC] Stopped {tier.name} in {stop_ms:.1f} ms "
+          f"(worst {handoff['worst_ms']:.1f} ms over {handoff['count']} handoffs)")
+
+
+def run_tier(tier, trigger_time, start_at=None):
+    def first_frame():
+        latency_ms = (time.monotonic() - trigger_time) * 1000.0
+        print(f"[OSC] {tier.name}: first show() {latency_ms:.1f} ms after trigger")
+
+        if start_at is not None:
+            late = time.time() - start_at
+            print(f"[SYNC] {tier.name}: started {late * 1000:+.1f} ms from target")
+            if sensor["address"] is not None:
+                send_osc(sensor["address"], "/sync/started", tier.name, late)
+
+    fb1.on_show = first_frame
+    FrameClock.reset_totals()
+    Framebuffer.reset_totals()
+    Output.reset_totals()
+    Profile.reset()
+    try:
+        # A timetagged trigger names the wall-clock time every Pi starts
+        # frame 0 at; the wait is cut short if the show is stopped.
+        if start_at is not None:
+            FrameClock.sleep(start_at - time.time())
+        tier.run(fb1, fb2)
+    except Exception as e:
+        print(f"[OSC] Error in {tier.name}: {e}")
+    finally:
+        fb1.on_show = None
+        FrameClock.report(tier.name)
+        Framebuffer.report(tier.name)
+        if output is not None:
+            Output.report(tier.name)
+        Profile.dump(tier.name)
+
+
+def start_tier(tier, trigger_time, start_at=None):
+    with show_lock:
+        stop_current()
+
+        warm = " from prepared frames" if tier.prepared is not None else ""
+        print(f"[OSC] Starting: {tier.name} ({tier.length:.1f} s){warm}")
+        tier.reset()
+        for fb in (fb1, fb2):
+            gain = (fb.brightness + 1) / (tier.brightness + 1)
+            fb.setBrightness(tier.brightness)
+            fb.crossfade(tier.crossfade, gain)
+
+        thread = threading.Thread(target=run_tier, args=(tier, trigger_time, start_at), daemon=True)
+        current["tier"] = tier
+        current["thread"] = thread
+        thread.start()
+
+
+def on_trigger(addr, *args):
+    # The sensor sends (1, start time); a bare trigger starts at once.
+    start_at = args[1] if len(args) > 1 else None
+    start_tier(TIERS[addr], time.monotonic(), start_at)
+
+
+def on_ping(client_address, addr, seq, t1):
+    t2 = time.time()
+    sensor["address"] = client_address
+    send_osc(client_address, "/sync/pong", seq, t1, t2, time.time())
+
+
+def on_prepare(addr, osc):
+    # The sensor announces the next tier during its cooldown, and the whole
+    # show is rendered ahead while the Pi is idle. It renders on the
+    # unpaced frame clock, so it holds the show lock and only runs while no
+    # show is playing; a trigger in the meantime waits for it.
+    tier = TIERS.get(osc)
+    if tier is None:
+        print(f"[PREPARE] Unknown tier {osc}")
+        return
+    with show_lock:
+        thread = current["thread"]
+        if thread is not None and thread.is_alive():
+            print(f"[PREPARE] {tier.name}: {current['tier'].name} is still playing, not prepared")
+            return
+        start = time.monotonic()
+        for plan in TIERS.values():
+            plan.release()
+        count = tier.prepare()
+    print(f"[PREPARE] {tier.name}: {count} frames rendered ahead in "
+          f"{(time.monotonic() - start) * 1000:.0f} ms")
+
+
+try:
+    # Handle timetagged bundles on arrival; run_tier waits for the start
+    # time itself, after the previous show has been stopped.
+    dispatcher = Dispatcher(strict_timing=False)
+except TypeError:
+    # Older python-osc holds a bundle until its timetag instead.
+    dispatcher = Dispatcher()
+for addr in TIERS:
+    dispatcher.map(addr, on_trigger)
+dispatcher.map("/sync/ping", on_ping, needs_reply_address=True)
+dispatcher.map("/prepare", on_prepare)
+
+
+def cleanup():
+    print("[OSC] Stopping current show...")
+    with show_lock:
+        stop_current()
+    for fb in (fb1, fb2):
+        fb.crossfade(0)
+        fb.clear()
+        fb.show()
+    if output is not None:
+        output.close()
 
 
 if __name__ == "__main__":
+    Show.prerender(TIERS.values())
+
     print("OSC Slave listening on port 5678...")
     server = osc_server.ThreadingOSCUDPServer(("0.0.0.0", 5678), dispatcher)
 
@@ -76,7 +200,6 @@ if __name__ == "__main__":
     except KeyboardInterrupt:
         print("\n[OSC] Ctrl+C received, shutting down OSC server...")
     finally:
-        cleanup_children()
+        cleanup()
         print("[OSC] Shutdown complete. Bye.")
         sys.exit(0)
-
@@ -0,0 +1,42 @@
+import numpy as np
+
+# Motion in LEDs per second. Positions are worked out from the frame
+# clock's time rather than counted up per loop, so a slow frame does not
+# slow the movement down, and a position between two LEDs lights both of
+# them in proportion instead of snapping to one.
+
+
+def position(speed, t, start=0.0, length=None):
+    # Where something moving at `speed` LEDs/s is `t` seconds in; with
+    # `length` the position wraps around a looped strip.
+    pos = start + speed * t
+    return pos % length if length else pos
+
+
+def place(pos, count, wrap=False):
+    # Anti-aliased placement: each position is split between the LED below
+    # it and the one above. Returns (low, high, low weight, high weight).
+    pos = np.asarray(pos, dtype=np.float64)
+    base = np.floor(pos)
+    frac = pos - base
+    low = base.astype(int)
+    high = low + 1
+    if wrap:
+        low %= count
+        high %= count
+    else:
+        high = np.minimum(high, count - 1)
+    return low, high, 1.0 - frac, frac
+
+
+def shift(pattern, offset, out):
+    # `pattern` moved `offset` LEDs along a looped strip, blending the two
+    # nearest whole-LED shifts by the fraction.
+    pattern = np.asarray(pattern, dtype=np.float32)
+    whole = int(np.floor(offset))
+    frac = offset - whole
+    moved = np.roll(pattern, whole, axis=0)
+    if frac:
+        moved = np.rint(moved + (np.roll(pattern, whole + 1, axis=0) - moved) * frac)
+    np.copyto(out, moved, casting="unsafe")
+    return out
@@ -0,0 +1,140 @@
+from Framebuffer import FrameBuffer
+import Topology
+from multiprocessing import shared_memory
+import multiprocessing
+import numpy as np
+import time
+
+# Splits the daemon into a render process (effects, FrameBuffers) and an
+# output process that owns the strips. They share one block of memory
+# holding two frame slots per channel. The renderer fills the slot of
+# frame N+1 while the output process is still pushing frame N down the
+# wire, so rendering and the WS281x transfer run on different cores.
+POLL = 0.0002
+
+totals = {"waits": 0, "waited": 0.0}
+
+
+def reset_totals():
+    for key in totals:
+        totals[key] = 0
+
+
+def report(name):
+    # Frames the renderer had to hold back because the output process was
+    # still two frames behind.
+    print(f"[OUTPUT] {name}: renderer waited on {totals['waits']} frames, "
+          f"{totals['waited'] * 1000:.0f} ms in all")
+
+
+class SharedArea:
+    # Per channel: `ready` is the last frame the renderer published and
+    # `taken` the last one the output process copied out. Frame k lives in
+    # slot k % 2, so the renderer may write frame k once `taken` >= k - 2.
+    def __init__(self, shm, channels, count):
+        self.shm = shm
+        buf = shm.buf
+        self.seq = np.ndarray((channels, 2), dtype=np.int64, buffer=buf)
+        offset = self.seq.nbytes
+        self.control = np.ndarray(1, dtype=np.int64, buffer=buf, offset=offset)
+        offset += self.control.nbytes
+        self.bright = np.ndarray((channels, 2), dtype=np.int64, buffer=buf, offset=offset)
+        offset += self.bright.nbytes
+        self.frames = np.ndarray((channels, 2, count), dtype=np.uint32, buffer=buf, offset=offset)
+
+    @staticmethod
+    def size(channels, count):
+        return 8 * (channels * 2 + 1 + channels * 2) + 4 * channels * 2 * count
+
+
+class SharedStrip:
+    # Stands in for a PixelStrip in the render process. `alive` reports
+    # whether the output process is still there to take frames.
+    def __init__(self, area, channel, count, alive, brightness=255):
+        self.area = area
+        self.channel = channel
+        self.count = count
+        self.alive = alive
+        self.brightness = brightness
+
+    def begin(self):
+        pass
+
+    def numPixels(self):
+        return self.count
+
+    def setBrightness(self, brightness):
+        self.brightness = brightness
+
+    def getBrightness(self):
+        return self.brightness
+
+    def load(self, colors, offset=0):
+        seq = self.area.seq[self.channel]
+        frame = seq[0] + 1
+        # Only blocks when the output process is two frames behind.
+        if seq[1] < frame - 2:
+            start = time.monotonic()
+            while seq[1] < frame - 2:
+                if not self.alive():
+                    raise RuntimeError("output process has exited")
+                time.sleep(POLL)
+            totals["waits"] += 1
+            totals["waited"] += time.monotonic() - start
+        self.area.frames[self.channel, frame % 2, offset:offset + len(colors)] = colors
+        self.area.bright[self.channel, frame % 2] = self.brightness
+
+    def show(self):
+        # Publishing is one store; the transfer happens in the output process.
+        self.area.seq[self.channel, 0] += 1
+
+
+def serve(area):
+    # Output process: show the newest published frame of each channel.
+    import Strip
+
+    strips = Strip.open_strips()
+    seq = area.seq
+    while not area.control[0]:
+        idle = True
+        for c, strip in enumerate(strips):
+            ready = int(seq[c, 0])
+            if ready > seq[c, 1]:
+                slot = ready % 2
+                Strip.write(strip, area.frames[c, slot])
+                strip.setBrightness(int(area.bright[c, slot]))
+                seq[c, 1] = ready
+                strip.show()
+                idle = False
+        if idle:
+            time.sleep(POLL)
+
+    for strip in strips:
+        Strip.write(strip, np.zeros(strip.numPixels(), dtype=np.uint32))
+        strip.show()
+
+
+class OutputProcess:
+    def __init__(self):
+        # Sized for the logical channels the output process opens.
+        layout = Topology.load()
+        channels, count = layout.channels, layout.count
+        self.shm = shared_memory.SharedMemory(create=True, size=SharedArea.size(channels, count))
+        self.area = SharedArea(self.shm, channels, count)
+        self.area.seq[:] = 0
+        self.area.control[0] = 0
+
+        # fork, so the child maps the same segment without registering it
+        # a second time with the resource tracker.
+        ctx = multiprocessing.get_context("fork")
+        self.process = ctx.Process(target=serve, args=(self.area,), daemon=True)
+        self.process.start()
+        self.buffers = tuple(FrameBuffer(SharedStrip(self.area, c, count, self.process.is_alive))
+                             for c in range(channels))
+
+    def close(self):
+        self.area.control[0] = 1
+        self.process.join(timeout=2.0)
+        del self.area
+        self.shm.close()
+        self.shm.unlink()
@@ -0,0 +1,88 @@
+import numpy as np
+
+# Every table is an [entries, 3] uint8 array laid out like
+# FrameBuffer.pixels, so effects colour a whole strip with one indexed
+# gather (table[indices]) and never build colours per pixel.
+
+GOLD = np.array([
+    (255, 180, 0),
+    (255, 215, 0),
+    (255, 120, 0),
+    (255, 255, 100),
+], dtype=np.uint8)
+
+FIRE = np.array([
+    (255, 60, 0),
+    (255, 80, 0),
+    (255, 120, 0),
+    (255, 180, 0),
+    (255, 100, 20),
+], dtype=np.uint8)
+
+JACKPOT = np.array([
+    (255, 200, 0),
+    (255, 255, 255),
+], dtype=np.uint8)
+
+WINNING_NEON = np.array([
+    (0, 255, 200),
+    (160, 0, 255),
+    (255, 0, 160),
+    (180, 255, 40),
+], dtype=np.uint8)
+
+HUE_STEPS = 256
+SAT_STEPS = 32
+VAL_STEPS = 64
+
+
+def hsv_to_rgb(h, s, v):
+    # Vectorised colorsys.hsv_to_rgb, truncated to 0-255 like the
+    # int(r * 255) the effects used before.
+    h, s, v = np.broadcast_arrays(np.asarray(h, dtype=float),
+                                  np.asarray(s, dtype=float),
+                                  np.asarray(v, dtype=float))
+    i = np.floor(h * 6.0)
+    f = h * 6.0 - i
+    p = v * (1.0 - s)
+    q = v * (1.0 - s * f)
+    t = v * (1.0 - s * (1.0 - f))
+    i = i.astype(int) % 6
+
+    r = np.choose(i, [v, q, p, p, t, v])
+    g = np.choose(i, [t, v, v, q, p, p])
+    b = np.choose(i, [p, p, t, v, v, q])
+    return (np.stack([r, g, b], axis=-1) * 255).astype(np.uint8)
+
+
+def _wheel_table():
+    pos = np.arange(256)
+    table = np.zeros((256, 3), dtype=np.uint8)
+
+    a = pos < 85
+    table[a] = np.stack([pos[a] * 3, 255 - pos[a] * 3, np.zeros(a.sum(), int)], axis=-1)
+
+    b = (pos >= 85) & (pos < 170)
+    p = pos[b] - 85
+    table[b] = np.stack([255 - p * 3, np.zeros(b.sum(), int), p * 3], axis=-1)
+
+    c = pos >= 170
+    p = pos[c] - 170
+    table[c] = np.stack([np.zeros(c.sum(), int), p * 3, 255 - p * 3], axis=-1)
+    return table
+
+
+WHEEL = _wheel_table()
+
+HSV = hsv_to_rgb(*np.meshgrid(np.arange(HUE_STEPS) / HUE_STEPS,
+                              np.arange(SAT_STEPS) / (SAT_STEPS - 1),
+                              np.arange(VAL_STEPS) / (VAL_STEPS - 1),
+                              indexing="ij"))
+
+
+def hsv(h, s, v):
+    # Nearest entry of the dense HSV table; h wraps, s and v are 0-1.
+    hi = (np.asarray(h) * HUE_STEPS).astype(int) % HUE_STEPS
+    si = np.rint(np.clip(s, 0.0, 1.0) * (SAT_STEPS - 1)).astype(int)
+    vi = np.rint(np.clip(v, 0.0, 1.0) * (VAL_STEPS - 1)).astype(int)
+    return HSV[hi, si, vi]
@@ -0,0 +1,62 @@
+import Motion
+import numpy as np
+
+
+class Particles:
+    # Structure-of-arrays particle state on a strip of `count` LEDs. Every
+    # update is a whole-array operation, so the cost per frame barely
+    # changes between a handful of disco spots and thousands of particles.
+    def __init__(self, count, capacity):
+        self.count = count
+        self.pos = np.zeros(capacity)
+        self.vel = np.zeros(capacity)
+        self.color = np.zeros((capacity, 3), dtype=np.uint8)
+        self.life = np.zeros(capacity)
+        self.alive = np.zeros(capacity, dtype=bool)
+        self.light = np.zeros((count, 3))
+
+    def spawn(self, pos, vel, color, life=np.inf):
+        # Fill free slots; particles that do not fit are dropped.
+        pos = np.atleast_1d(pos)
+        free = np.flatnonzero(~self.alive)[:len(pos)]
+        n = len(free)
+
+        self.pos[free] = pos[:n]
+        self.vel[free] = np.broadcast_to(vel, pos.shape)[:n]
+        self.color[free] = np.broadcast_to(color, pos.shape + (3,))[:n]
+        self.life[free] = np.broadcast_to(life, pos.shape)[:n]
+        self.alive[free] = True
+        return n
+
+    def step(self, dt=1.0):
+        alive = self.alive
+        self.pos[alive] += self.vel[alive] * dt
+
+        # Reflect off both ends of the strip.
+        low = alive & (self.pos < 0)
+        high = alive & (self.pos > self.count - 1)
+        self.pos[low] = 0
+        self.pos[high] = self.count - 1
+        self.vel[low | high] *= -1
+
+        self.life[alive] -= dt
+        self.alive &= self.life > 0
+
+    def splat(self):
+        # Scatter-add each live particle's colour onto the two LEDs around
+        # its position, weighted by how close it is to each.
+        alive = self.alive
+        low, high, w_low, w_high = Motion.place(self.pos[alive], self.count)
+        color = self.color[alive]
+        for c in range(3):
+            self.light[:, c] = (np.bincount(low, weights=color[:, c] * w_low, minlength=self.count)
+                                + np.bincount(high, weights=color[:, c] * w_high, minlength=self.count))
+        return self.light
+
+    def deposit(self, pixels):
+        # Add the last splat() onto a framebuffer, saturating at 255 where
+        # particles overlap or land on a bright trail.
+        total = self.light + pixels
+        np.minimum(total, 255, out=total)
+        pixels[:] = total
+        return pixels
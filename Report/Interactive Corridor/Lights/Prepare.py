@@ -0,0 +1,111 @@
+from Framebuffer import FrameBuffer
+import FrameClock
+import Prologue
+import RenderCache
+import Sparkle
+import Topology
+import numpy as np
+import os, random
+
+# A whole tier rendered ahead of its trigger, unpaced on the frame clock's
+# virtual time as Render.py does, and kept as a packed frame file that
+# RenderCache.play() sends out. Live effects (disco, neon, club, fire
+# wipe...) then cost nothing but the copy into the strips when the show
+# starts.
+
+# Frames are sampled at the spin's frame time, the fastest any effect
+# runs, so none of its steps is lost.
+FRAME_TIME = Prologue.SPIN_FRAME_TIME
+
+# Fixed, so a prepared tier is the same show every time and can be
+# reproduced offline with Render.py --seed.
+SEED = 0
+
+
+class RecordStrip:
+    # Stands in for a PixelStrip while a tier renders ahead: every show()
+    # notes the frame and the brightness at the current virtual time.
+    def __init__(self, count, brightness):
+        self.count = count
+        self.brightness = brightness
+        self.colors = np.zeros(count, dtype=np.uint32)
+        self.times = []
+        self.frames = []
+        self.levels = []
+
+    def begin(self):
+        pass
+
+    def numPixels(self):
+        return self.count
+
+    def setBrightness(self, brightness):
+        self.brightness = brightness
+
+    def getBrightness(self):
+        return self.brightness
+
+    def load(self, colors, offset=0):
+        self.colors[offset:offset + len(colors)] = colors
+
+    def show(self):
+        self.times.append(FrameClock.now())
+        self.frames.append(self.colors.copy())
+        self.levels.append(self.brightness)
+
+    def timeline(self, times, brightness):
+        # What the strip showed at each of `times`: dark at the tier's
+        # brightness until its first show.
+        frames = np.zeros((len(times), self.count), dtype=np.uint32)
+        levels = np.full(len(times), brightness, dtype=np.uint8)
+        last = np.searchsorted(self.times, times, side="right") - 1
+        have = last >= 0
+        if have.any():
+            frames[have] = np.stack(self.frames)[last[have]]
+            levels[have] = np.array(self.levels)[last[have]]
+        return frames, levels
+
+
+def render(plan, seed=SEED):
+    # Returns [T, S, N] packed frames and [T, S] brightness, one row per
+    # FRAME_TIME. The daemon holds its show lock while this runs, so no
+    # live show sees the clock unpaced.
+    random.seed(seed)
+    np.random.seed(seed)
+    Sparkle.reseed(seed)
+
+    layout = Topology.load()
+    strips = [RecordStrip(layout.count, plan.brightness) for _ in range(layout.channels)]
+    paced = FrameClock.PACED
+    FrameClock.PACED = False
+    FrameClock.virtual["now"] = 0.0
+    try:
+        plan.reset()
+        plan.run(*(FrameBuffer(strip) for strip in strips))
+        length = FrameClock.virtual["now"]
+    finally:
+        FrameClock.PACED = paced
+
+    times = np.arange(int(np.ceil(length / FRAME_TIME))) * FRAME_TIME
+    tracks = [strip.timeline(times, plan.brightness) for strip in strips]
+    frames = np.stack([frames for frames, _ in tracks], axis=1)
+    levels = np.stack([levels for _, levels in tracks], axis=1)
+    return frames, levels
+
+
+def frame_paths(plan):
+    base = os.path.join(RenderCache.CACHE_DIR, f"tier-{plan.name}")
+    return base + ".npy", base + ".brightness.npy"
+
+
+def prepare(plan, seed=SEED):
+    # Renders the tier to its frame files and reads them back whole, so
+    # the show never waits on the SD card either.
+    os.makedirs(RenderCache.CACHE_DIR, exist_ok=True)
+    paths = frame_paths(plan)
+    for path, data in zip(paths, render(plan, seed)):
+        tmp = path + ".tmp"
+        with open(tmp, "wb") as f:
+            np.save(f, data)
+        os.replace(tmp, path)
+    return tuple(np.load(path) for path in paths)
@@ -0,0 +1,113 @@
+import numpy as np
+import os, time
+
+# Per-frame stage timings, switched on with LIGHTS_PROFILE=1. When it is
+# off every hook is a function call that returns at once.
+ENABLED = os.environ.get("LIGHTS_PROFILE") == "1"
+PROFILE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "profiles")
+CAPACITY = 8192
+
+STAGES = ("compute", "pack", "transfer", "sleep")
+PACK, TRANSFER, SLEEP = 1, 2, 3
+
+# Ring buffer of frames: [wall time, compute, pack, transfer, sleep] plus
+# the index of the "tier;effect" label the frame ran under.
+rows = np.zeros((CAPACITY, 1 + len(STAGES)))
+row_labels = np.zeros(CAPACITY, dtype=np.int32)
+labels = []
+state = {"head": 0, "count": 0, "label": 0, "start": 0.0}
+acc = [0.0] * len(STAGES)
+
+
+def reset():
+    labels[:] = ["idle"]
+    state.update(head=0, count=0, label=0, start=time.perf_counter())
+    acc[:] = [0.0] * len(STAGES)
+
+
+def set_label(label):
+    if not ENABLED:
+        return
+    if label not in labels:
+        labels.append(label)
+    state["label"] = labels.index(label)
+
+
+def stamp():
+    return time.perf_counter() if ENABLED else 0.0
+
+
+def add(stage, since):
+    if ENABLED:
+        acc[stage] += time.perf_counter() - since
+
+
+def begin_frame():
+    # Start timing a new loop without charging it for what ran before.
+    if ENABLED:
+        state["start"] = time.perf_counter()
+        acc[:] = [0.0] * len(STAGES)
+
+
+def end_frame():
+    if not ENABLED:
+        return
+    now = time.perf_counter()
+    total = now - state["start"]
+    # Whatever the hooks did not claim is the effect's own work.
+    acc[0] = max(0.0, total - sum(acc[1:]))
+
+    head = state["head"]
+    rows[head, 0] = time.time()
+    rows[head, 1:] = acc
+    row_labels[head] = state["label"]
+    state["head"] = (head + 1) % CAPACITY
+    state["count"] = min(state["count"] + 1, CAPACITY)
+
+    state["start"] = now
+    acc[:] = [0.0] * len(STAGES)
+
+
+def frames():
+    # The recorded frames, oldest first.
+    count, head = state["count"], state["head"]
+    order = np.arange(head - count, head) % CAPACITY
+    return rows[order], row_labels[order]
+
+
+def dump_csv(path):
+    data, index = frames()
+    with open(path, "w") as f:
+        f.write("time,label," + ",".join(f"{s}_ms" for s in STAGES) + "\n")
+        for row, i in zip(data, index):
+            f.write(f"{row[0]:.6f},{labels[i]}," + ",".join(f"{v * 1000:.4f}" for v in row[1:]) + "\n")
+
+
+def dump_folded(path):
+    # Collapsed stacks ("tier;effect;stage microseconds") for flamegraph.pl
+    # or speedscope.
+    data, index = frames()
+    with open(path, "w") as f:
+        for i, label in enumerate(labels):
+            mine = data[index == i]
+            if not len(mine):
+                continue
+            for s, stage in enumerate(STAGES):
+                us = int(mine[:, 1 + s].sum() * 1e6)
+                if us:
+                    f.write(f"{label};{stage} {us}\n")
+
+
+def dump(name):
+    # Writes <name>-<time>.csv and .folded under profiles/.
+    if not ENABLED or not state["count"]:
+        return None
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    base = os.path.join(PROFILE_DIR, f"{name}-{time.strftime('%Y%m%d-%H%M%S')}")
+    dump_csv(base + ".csv")
+    dump_folded(base + ".folded")
+    print(f"[PROFILE] {name}: {state['count']} frames -> {base}.csv/.folded")
+    return base
+
+
+reset()
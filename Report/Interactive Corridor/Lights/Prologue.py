@@ -0,0 +1,95 @@
+from Framebuffer import pack
+import RenderCache
+import Strip
+from FrameClock import FrameClock
+from Reel import Reel
+import Palette
+from Sparkle import Sparkle
+import numpy as np
+
+# The slot-machine opening every tier starts with. It lives in one module
+# so all tiers share a single cached spin render.
+LED_COUNT = 400
+
+SPIN_DURATION = 11
+SPIN_SPEED = 0.00075
+SPIN_FRAME_TIME = LED_COUNT * Strip.LED_WIRE_TIME + SPIN_SPEED
+SPIN_STEP_SIZE = 3
+SPIN_RATE = SPIN_STEP_SIZE / SPIN_FRAME_TIME  # LEDs per second
+
+PULSE_STEP_TIME = 0.03
+PULSE_LEVELS = list(range(100, 255, 10)) + list(range(255, 100, -10))
+
+FLASH_TOTAL_DURATION = 4.0
+ON_TIME = 0.25
+OFF_TIME = 0.25
+FLASHES = int(FLASH_TOTAL_DURATION / (ON_TIME + OFF_TIME))
+
+running = True
+
+
+def clear(strip):
+    strip.clear()
+    strip.show()
+
+
+def spin_step(reels, color, distance, out):
+    # One frame of the spin: each reel turns and draws into its row of out.
+    for reel, strip in zip(reels, out):
+        reel.step(color, distance)
+        reel.render(strip)
+
+
+def render_spin(led_count, duration, rate, frame_time):
+    frames = np.zeros((int(duration / frame_time), 2, led_count, 3), dtype=np.uint8)
+    reels = (Reel(led_count), Reel(led_count, reverse=True))
+    steps = (np.arange(len(frames)) * frame_time * 100).astype(int)
+    step_colors = Palette.GOLD[steps % len(Palette.GOLD)]
+
+    for k in range(len(frames)):
+        spin_step(reels, step_colors[k], rate * frame_time, frames[k])
+
+    return pack(frames)
+
+
+def spin_frames():
+    return RenderCache.load(render_spin, led_count=LED_COUNT, duration=SPIN_DURATION,
+                            rate=SPIN_RATE, frame_time=SPIN_FRAME_TIME)
+
+
+def spin_both(s1, s2):
+    RenderCache.play(spin_frames(), (s1, s2), SPIN_FRAME_TIME, lambda: running)
+
+
+def anticipation_pulse(s1, s2, cycles=1):
+    for _ in range(cycles):
+        for k in FrameClock(PULSE_STEP_TIME, frames=len(PULSE_LEVELS), running=lambda: running):
+            s1.setBrightness(PULSE_LEVELS[k])
+            s2.setBrightness(PULSE_LEVELS[k])
+            s1.show()
+            s2.show()
+
+
+def jackpot_flash(s1, s2):
+    sparkle = Sparkle(Palette.JACKPOT, 1.0, (2, s1.numPixels()), block=FLASHES)
+
+    clock = FrameClock(ON_TIME + OFF_TIME, frames=FLASHES, running=lambda: running)
+    for _ in clock:
+        sparkle.draw((s1, s2))
+        s1.show()
+        s2.show()
+
+        clock.at(ON_TIME)
+        clear(s1)
+        clear(s2)
+
+
+def sparkle_fade(s1, s2, duration=1.5, density=0.03):
+    # Leaves the last sparkles lit; the timeline decides whether the next
+    # segment clears them or fades them out.
+    sparkle = Sparkle((255, 215, 0), density, (2, s1.numPixels()))
+
+    for _ in FrameClock(0.04, duration, running=lambda: running):
+        sparkle.draw((s1, s2), background=0)
+        s1.show()
+        s2.show()
@@ -0,0 +1,57 @@
+import numpy as np
+
+
+class Reel:
+    # A spinning strip kept as a circular buffer. Visible pixel i lives at
+    # buffer[(head + i) % count], so a spin step moves `head` and only
+    # writes the pixels entering the strip. `pos` is how far the reel has
+    # turned in LEDs; its fraction blends each pixel with the one moving
+    # into its place, so a speed that is not a whole number of LEDs per
+    # frame still moves smoothly.
+    def __init__(self, count, reverse=False):
+        self.count = count
+        self.reverse = reverse
+        self.buffer = np.zeros((count, 3), dtype=np.uint8)
+        self.head = 0
+        self.pos = 0.0
+        self.color = np.zeros(3, dtype=np.uint8)
+
+    def step(self, color, distance):
+        # Turn the reel `distance` LEDs, feeding in `color`. The position is
+        # rounded so a whole number of LEDs per frame, given as a rate times
+        # a frame time, does not drift a hair below the next LED.
+        pos = round(self.pos + distance, 9)
+        crossed = int(pos) - int(self.pos)
+        self.pos = pos
+        self.color = np.asarray(color, dtype=np.uint8)
+        if not crossed:
+            return
+        crossed = min(crossed, self.count)
+
+        if self.reverse:
+            # Content moves towards pixel 0; new pixels enter at the far end.
+            self.head = (self.head + crossed) % self.count
+            entering = self.head + self.count - crossed
+        else:
+            self.head = (self.head - crossed) % self.count
+            entering = self.head
+
+        self.buffer[(entering + np.arange(crossed)) % self.count] = color
+
+    def render(self, out):
+        split = self.count - self.head
+        out[:split] = self.buffer[self.head:]
+        out[split:] = self.buffer[:self.head]
+
+        frac = self.pos % 1.0
+        if frac:
+            now = out.astype(np.float32)
+            coming = np.empty_like(now)
+            if self.reverse:
+                coming[:-1] = now[1:]
+                coming[-1] = self.color
+            else:
+                coming[1:] = now[:-1]
+                coming[0] = self.color
+            np.copyto(out, np.rint(now + (coming - now) * frac), casting="unsafe")
+        return out
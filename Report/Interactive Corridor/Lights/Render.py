@@ -0,0 +1,139 @@
+import os, sys
+
+# Renders a tier offline on SimStrip with pacing off, as fast as the CPU
+# allows, so effects can be previewed and compared without the corridor.
+os.environ["LIGHTS_SIM"] = "1"
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import FrameClock
+import Show
+import SimStrip
+import Sparkle
+import numpy as np
+import argparse, random, struct, time, zlib
+
+RENDER_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "renders")
+FPS = 50
+GAP = 4  # dark columns between strips in the timeline image
+
+
+class Recorder:
+    # Collects every show() of the simulated strips as (virtual time, RGB
+    # as the LEDs would show it after brightness).
+    def __init__(self, strips):
+        self.strips = list(strips)
+        self.events = [[] for _ in self.strips]
+
+    def __call__(self, strip):
+        if strip not in self.strips:
+            return
+        self.events[self.strips.index(strip)].append((FrameClock.now(), strip.rgb()))
+
+    def timeline(self, fps, length):
+        # Resample to a fixed frame rate: every sample shows what each strip
+        # last showed at or before that time, so renders of different
+        # versions of an effect line up frame for frame.
+        times = np.arange(int(np.ceil(length * fps))) / fps
+        count = max(s.numPixels() for s in self.strips)
+        frames = np.zeros((len(times), len(self.strips), count, 3), dtype=np.uint8)
+        for i, events in enumerate(self.events):
+            if not events:
+                continue
+            shown = np.array([t for t, _ in events])
+            pixels = np.stack([rgb for _, rgb in events])
+            last = np.searchsorted(shown, times, side="right") - 1
+            have = last >= 0
+            frames[have, i, :pixels.shape[1]] = pixels[last[have]]
+        return frames
+
+
+def write_png(path, rgb):
+    # Minimal 8-bit RGB PNG writer, so the preview needs nothing beyond numpy.
+    h, w, _ = rgb.shape
+    raw = np.concatenate([np.zeros((h, 1), dtype=np.uint8), rgb.reshape(h, w * 3)], axis=1)
+
+    def chunk(tag, data):
+        return (struct.pack("!I", len(data)) + tag + data
+                + struct.pack("!I", zlib.crc32(tag + data) & 0xFFFFFFFF))
+
+    with open(path, "wb") as f:
+        f.write(b"\x89PNG\r\n\x1a\n")
+        f.write(chunk(b"IHDR", struct.pack("!IIBBBBB", w, h, 8, 2, 0, 0, 0)))
+        f.write(chunk(b"IDAT", zlib.compress(raw.tobytes(), 6)))
+        f.write(chunk(b"IEND", b""))
+
+
+def timeline_image(frames):
+    # One row per frame, time running down; strips side by side.
+    t, strips, count, _ = frames.shape
+    image = np.zeros((t, strips * count + (strips - 1) * GAP, 3), dtype=np.uint8)
+    for i in range(strips):
+        x = i * (count + GAP)
+        image[:, x:x + count] = frames[:, i]
+    return image
+
+
+def render(plan, fps=FPS, out=RENDER_DIR, seed=0):
+    plan.prerender()
+    # Seeded, so two renders differ only where the effect code does.
+    random.seed(seed)
+    np.random.seed(seed)
+    Sparkle.reseed(seed)
+
+    FrameClock.PACED = False
+    FrameClock.virtual["now"] = 0.0
+    opened = len(SimStrip.strips)
+    fb1, fb2 = Show.open_strips()
+    recorder = Recorder(SimStrip.strips[opened:])
+    SimStrip.listeners.append(recorder)
+    fb1.setBrightness(plan.brightness)
+    fb2.setBrightness(plan.brightness)
+
+    start = time.perf_counter()
+    plan.reset()
+    plan.run(fb1, fb2)
+    elapsed = time.perf_counter() - start
+    SimStrip.listeners.remove(recorder)
+
+    length = FrameClock.virtual["now"]
+    frames = recorder.timeline(fps, length)
+    os.makedirs(out, exist_ok=True)
+    base = os.path.join(out, plan.name)
+    np.savez_compressed(base + ".npz", frames=frames, fps=fps)
+    write_png(base + ".png", timeline_image(frames))
+
+    print(f"[RENDER] {plan.name}: {length:.1f} s show, {len(frames)} frames in {elapsed:.2f} s "
+          f"({length / max(elapsed, 1e-9):.0f}x realtime) -> {base}.npz/.png")
+    return base
+
+
+def compare(path_a, path_b):
+    # Frame-by-frame difference of two renders of the same tier.
+    a, b = np.load(path_a)["frames"], np.load(path_b)["frames"]
+    if a.shape[1:] != b.shape[1:]:
+        print(f"[RENDER] Strip layouts differ: {a.shape[1:]} vs {b.shape[1:]}")
+        return
+    n = min(len(a), len(b))
+    diff = np.abs(a[:n].astype(np.int16) - b[:n].astype(np.int16)).max(axis=(1, 2, 3))
+    changed = np.flatnonzero(diff)
+    print(f"[RENDER] {len(a)} vs {len(b)} frames, {len(changed)} of {n} differ")
+    if len(changed):
+        print(f"[RENDER] first difference at frame {changed[0]}, largest {diff.max()} levels")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Render a tier offline to a frame file and timeline PNG.")
+    parser.add_argument("tiers", nargs="*", help="tier names from shows.json (default: all)")
+    parser.add_argument("--fps", type=int, default=FPS, help="frame rate of the saved timeline")
+    parser.add_argument("--out", default=RENDER_DIR, help="output directory")
+    parser.add_argument("--seed", type=int, default=0, help="seed for the effects' random numbers")
+    parser.add_argument("--compare", nargs=2, metavar=("A", "B"), help="compare two .npz renders")
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(*args.compare)
+        sys.exit(0)
+
+    plans = Show.load()
+    for name in args.tiers or list(plans):
+        render(plans[name], args.fps, args.out, args.seed)
@@ -0,0 +1,102 @@
+from Framebuffer import unpack
+from FrameClock import FrameClock
+import numpy as np
+import hashlib, inspect, json, os, glob
+
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "cache")
+ENABLED = os.environ.get("LIGHTS_CACHE", "1") != "0"
+
+
+def cache_name(render):
+    module = os.path.splitext(os.path.basename(inspect.getsourcefile(render)))[0]
+    return f"{module}.{render.__name__}"
+
+
+def code_names(code):
+    names = set(code.co_names)
+    for const in code.co_consts:
+        if inspect.iscode(const):
+            names |= code_names(const)
+    return names
+
+
+def sources(render):
+    # The renderer's own file plus every Lights module whose names it uses
+    # (Reel, Palette, Front...), so editing one of those invalidates the
+    # cached frames too.
+    here = os.path.dirname(os.path.abspath(__file__))
+    files = {os.path.abspath(inspect.getsourcefile(render))}
+    for name in code_names(render.__code__):
+        obj = render.__globals__.get(name)
+        module = obj if inspect.ismodule(obj) else inspect.getmodule(obj)
+        path = getattr(module, "__file__", None)
+        if path and os.path.dirname(os.path.abspath(path)) == here:
+            files.add(os.path.abspath(path))
+    return sorted(files)
+
+
+def cache_path(render, params):
+    # The key covers the source of the renderer and the modules it uses as
+    # well as its parameters, so editing an effect, a helper it calls or a
+    # constant such as LED_COUNT gives a new file.
+    texts = []
+    for path in sources(render):
+        with open(path) as f:
+            texts.append(f.read())
+    key = json.dumps([texts, params], sort_keys=True)
+    digest = hashlib.sha1(key.encode()).hexdigest()[:16]
+    return os.path.join(CACHE_DIR, f"{cache_name(render)}-{digest}.npy")
+
+
+def render_to_disk(render, **params):
+    path = cache_path(render, params)
+    frames = np.ascontiguousarray(render(**params), dtype=np.uint32)
+
+    # Renders made from older sources can never be hit again, so drop
+    # them instead of letting the cache grow.
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    source_mtime = max(os.path.getmtime(p) for p in sources(render))
+    for old in glob.glob(os.path.join(CACHE_DIR, f"{cache_name(render)}-*.npy")):
+        if os.path.getmtime(old) < source_mtime:
+            os.remove(old)
+
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        np.save(f, frames)
+    os.replace(tmp, path)
+
+    print(f"[CACHE] {cache_name(render)}: {frames.shape[0]} frames -> {path}")
+    return path
+
+
+def load(render, **params):
+    path = cache_path(render, params)
+    if not ENABLED:
+        return np.asarray(render(**params), dtype=np.uint32)
+    if not os.path.exists(path):
+        render_to_disk(render, **params)
+    return np.load(path, mmap_mode="r")
+
+
+def play(frames, strips, frame_delay, running=lambda: True, brightness=None):
+    # frames is [T, S, N] packed colours; a single-strip render is
+    # sent to every strip. `brightness`, [T, S], sets each strip's
+    # brightness along with its frame.
+    shown = None
+    for k in FrameClock(frame_delay, frames=len(frames), running=running):
+        frame = frames[k]
+        for i, fb in enumerate(strips):
+            if brightness is not None:
+                fb.setBrightness(int(brightness[k, i % len(frame)]))
+            fb.show_packed(frame[i % len(frame)])
+        shown = frame
+
+    if shown is not None:
+        for i, fb in enumerate(strips):
+            fb.pixels[:] = unpack(shown[i % len(shown)])
+
+
+if __name__ == "__main__":
+    import Show
+
+    Show.prerender(Show.load().values())
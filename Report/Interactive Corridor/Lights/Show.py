@@ -0,0 +1,199 @@
+import Strip
+import FrameClock
+import Profile
+import Prepare
+import RenderCache
+from Framebuffer import FrameBuffer
+import Prologue, Common, Uncommon, Rare, Epic, Legendary
+import inspect, json, os, sys
+
+SHOWS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "shows.json")
+
+
+def clear_both(s1, s2):
+    Prologue.clear(s1)
+    Prologue.clear(s2)
+
+
+def wait(s1, s2, duration):
+    FrameClock.sleep(duration)
+
+
+class Effect:
+    # One entry of the effect registry. A segment's parameters are checked
+    # against the signature of `run`; `length` gives the nominal running
+    # time and `prerender` builds any cached frames the effect plays.
+    def __init__(self, run, length=None, prerender=None):
+        self.run = run
+        self.module = sys.modules[run.__module__]
+        params = list(inspect.signature(run).parameters.values())[2:]
+        self.params = {p.name for p in params}
+        self.defaults = {p.name: p.default for p in params if p.default is not p.empty}
+        self.length = length or (lambda p: p["duration"])
+        self.prerender = prerender
+
+
+EFFECTS = {
+    "clear": Effect(clear_both, length=lambda p: 0.0),
+    "wait": Effect(wait),
+    "spin": Effect(Prologue.spin_both, length=lambda p: Prologue.SPIN_DURATION,
+                   prerender=lambda p: Prologue.spin_frames()),
+    "anticipation_pulse": Effect(Prologue.anticipation_pulse,
+                                 length=lambda p: p["cycles"] * len(Prologue.PULSE_LEVELS) * Prologue.PULSE_STEP_TIME),
+    "jackpot_flash": Effect(Prologue.jackpot_flash,
+                            length=lambda p: Prologue.FLASHES * (Prologue.ON_TIME + Prologue.OFF_TIME)),
+    "sparkle_fade": Effect(Prologue.sparkle_fade),
+    "white_fade": Effect(Common.white_fade_sequence,
+                         length=lambda p: Common.FADE_IN_DURATION + Common.FADE_OUT_DURATION,
+                         prerender=lambda p: (Common.fade_in_frames(), Common.fade_out_frames())),
+    "disco_ball": Effect(Uncommon.disco_ball),
+    "neon_breathing_groups": Effect(Rare.run_neon_breathing_groups),
+    "fade_to_black": Effect(Epic.fade_to_black, length=lambda p: (p["steps"] + 1) * 0.02 + p["gap_time"]),
+    "sparkle_fade_white": Effect(Epic.sparkle_fade_white),
+    "fire_wipe": Effect(Epic.fire_wipe),
+    "moving_groups": Effect(Epic.moving_groups),
+    "winning_effect": Effect(Epic.winning_effect),
+    "club": Effect(Legendary.club_129bpm_effect, length=lambda p: p["duration"] + 21 * 0.03),
+    "blast": Effect(Legendary.blast_effect, prerender=lambda p: Legendary.blast_frames(p["duration"])),
+}
+
+
+class Plan:
+    # A tier's timeline compiled against the registry: every segment is an
+    # (effect, params) pair with all defaults filled in, so running the
+    # plan is a flat loop and its length is known before it starts.
+    def __init__(self, name, osc, brightness, segments, crossfade=0.0):
+        self.name = name
+        self.osc = osc
+        self.brightness = brightness
+        self.crossfade = crossfade
+        self.segments = segments
+        self.length = sum(effect.length(params) for effect, params in segments)
+        self.modules = {effect.module for effect, _ in segments}
+        self.running = False
+        self.prepared = None
+
+    def prerender(self, done=None):
+        done = set() if done is None else done
+        for effect, params in self.segments:
+            key = (effect.run, json.dumps(params, sort_keys=True))
+            if effect.prerender and key not in done:
+                effect.prerender(params)
+                done.add(key)
+        return done
+
+    def prepare(self, seed=Prepare.SEED):
+        # Renders the whole timeline ahead (Prepare.py); run() then plays
+        # those frames instead of computing the effects live.
+        self.prepared = None
+        self.prepared = Prepare.prepare(self, seed)
+        return len(self.prepared[0])
+
+    def release(self):
+        self.prepared = None
+
+    def reset(self):
+        # Called before the plan's thread starts, so a stop() that arrives
+        # straight after a trigger is never overwritten.
+        self.running = True
+        for module in self.modules:
+            module.running = True
+        FrameClock.resume()
+
+    def run(self, s1, s2):
+        if self.prepared is not None:
+            frames, brightness = self.prepared
+            Profile.set_label(f"{self.name};prepared")
+            RenderCache.play(frames, (s1, s2), Prepare.FRAME_TIME, lambda: self.running, brightness)
+            return
+        for effect, params in self.segments:
+            if not self.running:
+                break
+            Profile.set_label(f"{self.name};{effect.run.__name__}")
+            effect.run(s1, s2, **params)
+
+    def stop(self):
+        # Every effect polls its own module's `running` flag; interrupt()
+        # cuts short whatever sleep the effect is in, so the stop lands
+        # within the current frame.
+        self.running = False
+        for module in self.modules:
+            module.running = False
+        FrameClock.interrupt()
+
+
+def compile_segment(tier, spec):
+    spec = dict(spec)
+    name = spec.pop("effect")
+    if name not in EFFECTS:
+        raise ValueError(f"{tier}: unknown effect '{name}'")
+
+    effect = EFFECTS[name]
+    unknown = set(spec) - effect.params
+    if unknown:
+        raise ValueError(f"{tier}: {name} has no parameter {', '.join(sorted(unknown))}")
+    params = {**effect.defaults, **spec}
+    missing = effect.params - set(params)
+    if missing:
+        raise ValueError(f"{tier}: {name} needs {', '.join(sorted(missing))}")
+    return effect, params
+
+
+def compile_tier(spec, sequences, crossfade=0.0):
+    segments = []
+    for item in spec["timeline"]:
+        # A string names a shared sequence such as the prologue.
+        for seg in sequences[item] if isinstance(item, str) else [item]:
+            segments.append(compile_segment(spec["name"], seg))
+    return Plan(spec["name"], spec["osc"], spec.get("brightness", Strip.LED_BRIGHTNESS), segments,
+                spec.get("crossfade", crossfade))
+
+
+def load(path=SHOWS):
+    with open(path) as f:
+        data = json.load(f)
+
+    plans = {}
+    for spec in data["tiers"]:
+        plan = compile_tier(spec, data.get("sequences", {}), data.get("crossfade", 0.0))
+        plans[plan.name] = plan
+        print(f"[SHOW] {plan.name}: {len(plan.segments)} segments, {plan.length:.1f} s")
+    return plans
+
+
+def prerender(plans):
+    # Segments with the same effect and parameters, such as the prologue
+    # spin, are rendered once for all tiers.
+    done = set()
+    for plan in plans:
+        plan.prerender(done)
+
+
+def open_strips():
+    strip1, strip2 = Strip.open_strips()
+    return FrameBuffer(strip1), FrameBuffer(strip2)
+
+
+if __name__ == "__main__":
+    names = [a for a in sys.argv[1:] if not a.startswith("--")]
+    if not names:
+        print("usage: python Show.py <tier> [--sim]")
+        sys.exit(1)
+
+    plans = load()
+    plan = plans[names[0]]
+    plan.prerender()
+
+    fb1, fb2 = open_strips()
+    fb1.setBrightness(plan.brightness)
+    fb2.setBrightness(plan.brightness)
+
+    try:
+        Profile.reset()
+        plan.reset()
+        plan.run(fb1, fb2)
+    except KeyboardInterrupt:
+        plan.stop()
+        clear_both(fb1, fb2)
+    Profile.dump(plan.name)
+    sys.exit(0)
@@ -0,0 +1,136 @@
+from Framebuffer import unpack
+import Strip
+import numpy as np
+import atexit, os, struct, threading, time
+
+# Stand-in for rpi_ws281x on machines with no LEDs attached. Pixels live in
+# memory, every show() is timed, and with LIGHTS_SIM_LOG set each shown
+# frame is appended to a binary log that read_log() plays back.
+WIRE = os.environ.get("LIGHTS_SIM_WIRE") == "1"
+LOG_PATH = os.environ.get("LIGHTS_SIM_LOG")
+
+LOG_MAGIC = b"LEDLOG1\n"
+RECORD = struct.Struct("<BdH")  # channel, monotonic time, pixel count
+
+strips = []
+# Called with the strip after every show(); Render.py records frames here.
+listeners = []
+_log = None
+_log_lock = threading.Lock()
+
+
+def Color(red, green, blue, white=0):
+    return (white << 24) | (red << 16) | (green << 8) | blue
+
+
+def _write(channel, t, rgb):
+    global _log
+    with _log_lock:
+        if _log is None:
+            _log = open(LOG_PATH, "wb")
+            _log.write(LOG_MAGIC)
+        _log.write(RECORD.pack(channel, t, len(rgb)))
+        _log.write(rgb.tobytes())
+
+
+def read_log(path):
+    # Yields (channel, time, pixels) for every frame in a log, with pixels
+    # as an [N, 3] uint8 array of what the LEDs would have shown.
+    with open(path, "rb") as f:
+        if f.read(len(LOG_MAGIC)) != LOG_MAGIC:
+            raise ValueError(f"{path} is not an LED frame log")
+        while True:
+            header = f.read(RECORD.size)
+            if len(header) < RECORD.size:
+                return
+            channel, t, count = RECORD.unpack(header)
+            pixels = np.frombuffer(f.read(count * 3), dtype=np.uint8)
+            yield channel, t, pixels.reshape(count, 3)
+
+
+def report():
+    for strip in strips:
+        if strip.shows:
+            print(f"[SIM] channel {strip.channel}: {strip.shows} shows, "
+                  f"{strip.show_time / strip.shows * 1000:.3f} ms per show")
+
+
+class PixelStrip:
+    def __init__(self, num, pin, freq_hz=800000, dma=10, invert=False,
+                 brightness=255, channel=0, strip_type=None, gamma=None):
+        self.num = num
+        self.channel = channel
+        self.brightness = brightness
+        self.data = np.zeros(num, dtype=np.uint32)
+        self.shows = 0
+        self.show_time = 0.0
+        self.last_show = 0.0
+        strips.append(self)
+
+    def begin(self):
+        pass
+
+    def show(self):
+        start = time.perf_counter()
+
+        if LOG_PATH:
+            _write(self.channel, time.monotonic(), self.rgb())
+
+        if WIRE:
+            # Busy-wait: sleep() is too coarse for a 12 ms transfer.
+            end = start + self.num * Strip.LED_WIRE_TIME + Strip.RESET_TIME
+            while time.perf_counter() < end:
+                pass
+
+        self.last_show = time.perf_counter() - start
+        self.show_time += self.last_show
+        self.shows += 1
+        for listener in listeners:
+            listener(self)
+
+    def rgb(self):
+        # [N, 3] of what the LEDs show: the driver scales every channel by
+        # (brightness + 1) / 256.
+        scale = (self.brightness & 0xFF) + 1
+        return ((unpack(self.data).astype(np.uint16) * scale) >> 8).astype(np.uint8)
+
+    def numPixels(self):
+        return self.num
+
+    def setPixelColor(self, n, color):
+        self.data[n] = color
+
+    def setPixelColorRGB(self, n, red, green, blue, white=0):
+        self.data[n] = Color(red, green, blue, white)
+
+    def getPixelColor(self, n):
+        return int(self.data[n])
+
+    def getPixels(self):
+        return self.data
+
+    def setBrightness(self, brightness):
+        self.brightness = brightness
+
+    def getBrightness(self):
+        return self.brightness
+
+    def __setitem__(self, pos, value):
+        # Like rpi_ws281x: a slice sets every LED in it to one colour, and
+        # anything but a single int is rejected the way SWIG rejects it.
+        if not isinstance(value, (int, np.integer)):
+            raise TypeError(f"in method 'ws2811_led_set', argument 3 of type 'ws2811_led_t': {type(value).__name__}")
+        self.data[pos] = value
+
+    def __getitem__(self, pos):
+        return self.data[pos]
+
+    def __len__(self):
+        return self.num
+
+
+@atexit.register
+def _close():
+    report()
+    if _log is not None:
+        _log.close()
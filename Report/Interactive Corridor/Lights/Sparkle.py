@@ -0,0 +1,59 @@
+import numpy as np
+import os
+
+# Set LIGHTS_SEED to make every sparkle in a show repeat exactly.
+SEED = os.environ.get("LIGHTS_SEED")
+_seeds = np.random.SeedSequence(None if SEED is None else int(SEED))
+
+
+def reseed(seed):
+    # Restart the sparkle streams, e.g. before each offline render.
+    global _seeds
+    _seeds = np.random.SeedSequence(seed)
+
+
+class Sparkle:
+    # Draws which pixels light up, and in which palette colour, for a block
+    # of frames with a single Generator call per array instead of one
+    # random() per pixel per frame.
+    def __init__(self, palette, density, shape, seed=None, block=32):
+        self.palette = np.asarray(palette, dtype=np.uint8).reshape(-1, 3)
+        self.density = density
+        self.shape = tuple(shape)
+        self.block = block
+        self.rng = np.random.default_rng(_seeds.spawn(1)[0] if seed is None else seed)
+        self.k = block
+
+    def refill(self):
+        size = (self.block,) + self.shape
+        if self.density < 1.0:
+            self.lit = self.rng.random(size, dtype=np.float32) < self.density
+        else:
+            self.lit = None
+        if len(self.palette) > 1:
+            self.index = self.rng.integers(0, len(self.palette), size, dtype=np.uint8)
+        else:
+            self.index = None
+        self.k = 0
+
+    def draw(self, strips, background=None):
+        if self.k == self.block:
+            self.refill()
+
+        for i, strip in enumerate(strips):
+            if background is not None:
+                strip.fill(background)
+
+            if self.lit is None:
+                if self.index is None:
+                    strip.fill(self.palette[0])
+                else:
+                    strip.pixels[:] = self.palette[self.index[self.k, i]]
+            else:
+                lit = self.lit[self.k, i]
+                if self.index is None:
+                    strip.pixels[lit] = self.palette[0]
+                else:
+                    strip.pixels[lit] = self.palette[self.index[self.k, i][lit]]
+
+        self.k += 1
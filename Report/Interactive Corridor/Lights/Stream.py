@@ -0,0 +1,146 @@
+from Framebuffer import FrameBuffer
+import Strip
+import Topology
+import numpy as np
+import random, socket, struct, sys, time
+
+# DDP-style pixel stream: one renderer sends every frame to the light Pis,
+# which only copy the pixels into their strips. A frame is split into
+# packets of at most MAX_PIXELS; the last one carries the PUSH flag that
+# tells the receiver to show().
+STREAM_PORT = 4048
+MAGIC = b"LD"
+PUSH = 0x01
+
+# magic, flags, channel, brightness, sender session, frame sequence,
+# sender time, first pixel, pixel count
+HEADER = struct.Struct("!2sBBBHIdHH")
+MAX_PIXELS = (1472 - HEADER.size) // 3
+
+
+class Sender:
+    def __init__(self, hosts, port=STREAM_PORT):
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.targets = [(host, port) for host in hosts]
+        self.seq = {}
+        # A restarted renderer counts from 1 again; the new session tells
+        # the receivers not to treat its frames as stale.
+        self.session = random.getrandbits(16)
+
+    def send(self, channel, brightness, view, count):
+        # `view` is a memoryview over the RGB bytes of the frame; each packet
+        # goes out as header + a slice of it, so the payload is never copied.
+        seq = self.seq[channel] = (self.seq.get(channel, 0) + 1) & 0xFFFFFFFF
+        now = time.time()
+
+        for offset in range(0, count, MAX_PIXELS):
+            n = min(MAX_PIXELS, count - offset)
+            flags = PUSH if offset + n == count else 0
+            header = HEADER.pack(MAGIC, flags, channel, brightness, self.session, seq, now, offset, n)
+            payload = view[offset * 3:(offset + n) * 3]
+            for target in self.targets:
+                self.sock.sendmsg([header, payload], [], 0, target)
+
+
+class StreamStrip:
+    # Stands in for a PixelStrip on the renderer: show() streams the frame
+    # to the receivers instead of driving LEDs.
+    def __init__(self, sender, channel, count, brightness=255):
+        self.sender = sender
+        self.channel = channel
+        self.count = count
+        self.brightness = brightness
+        self.rgb = np.zeros((count, 3), dtype=np.uint8)
+        self.view = memoryview(self.rgb).cast("B")
+
+    def begin(self):
+        pass
+
+    def numPixels(self):
+        return self.count
+
+    def setBrightness(self, brightness):
+        self.brightness = brightness
+
+    def getBrightness(self):
+        return self.brightness
+
+    def load(self, colors, offset=0):
+        # Unpack straight into the preallocated RGB buffer.
+        rgb = self.rgb[offset:offset + len(colors)]
+        np.right_shift(colors, 16, out=rgb[:, 0], casting="unsafe")
+        np.right_shift(colors, 8, out=rgb[:, 1], casting="unsafe")
+        np.copyto(rgb[:, 2], colors, casting="unsafe")
+
+    def show(self):
+        self.sender.send(self.channel, self.brightness, self.view, self.count)
+
+
+def open_buffers(hosts, port=STREAM_PORT):
+    # One stream channel per logical channel of the topology.
+    layout = Topology.load()
+    sender = Sender(hosts, port)
+    return tuple(FrameBuffer(StreamStrip(sender, c, layout.count)) for c in range(layout.channels))
+
+
+class Receiver:
+    # Runs on each light Pi. Packets go straight from the socket into a
+    # preallocated buffer and from there into the strip; frames that arrive
+    # out of order are dropped rather than shown late.
+    def __init__(self, strips, port=STREAM_PORT):
+        self.strips = strips
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.bind(("0.0.0.0", port))
+        self.buffer = bytearray(2048)
+        self.view = memoryview(self.buffer)
+        self.last = [None] * len(strips)
+        self.session = [None] * len(strips)
+        self.frames = 0
+        self.lost = 0
+        self.stale = 0
+
+    def handle(self, size):
+        magic, flags, channel, brightness, session, seq, sent, offset, n = HEADER.unpack_from(self.buffer)
+        if magic != MAGIC or channel >= len(self.strips) or size < HEADER.size + n * 3:
+            return
+
+        # A new sender session starts its own sequence.
+        if session != self.session[channel]:
+            self.session[channel] = session
+            self.last[channel] = None
+
+        # Packets of a frame older than the last one shown are stale.
+        last = self.last[channel]
+        ahead = 1 if last is None else (seq - last) & 0xFFFFFFFF
+        if ahead == 0 or ahead > 0x7FFFFFFF:
+            self.stale += 1
+            return
+
+        payload = self.view[HEADER.size:HEADER.size + n * 3]
+        rgb = np.frombuffer(payload, dtype=np.uint8).reshape(n, 3).astype(np.uint32)
+        strip = self.strips[channel]
+        Strip.write(strip, (rgb[:, 0] << 16) | (rgb[:, 1] << 8) | rgb[:, 2], offset)
+
+        if flags & PUSH:
+            self.lost += ahead - 1
+            self.last[channel] = seq
+            strip.setBrightness(brightness)
+            strip.show()
+            self.frames += 1
+
+    def serve(self):
+        while True:
+            size = self.sock.recv_into(self.buffer)
+            if size >= HEADER.size:
+                self.handle(size)
+
+
+if __name__ == "__main__":
+    receiver = Receiver(Strip.open_strips())
+    print(f"Stream receiver listening on port {STREAM_PORT}...")
+    try:
+        receiver.serve()
+    except KeyboardInterrupt:
+        print(f"\n[STREAM] {receiver.frames} frames shown, {receiver.lost} lost, "
+              f"{receiver.stale} stale packets")
+        sys.exit(0)
@@ -0,0 +1,66 @@
+import Topology
+import numpy as np
+import ctypes, importlib, os, sys
+
+# Set LIGHTS_SIM=1 or pass --sim to run on the in-memory SimStrip backend
+# instead of the real LEDs.
+__all__ = ["SIMULATED", "driver", "open_strips", "write"]
+
+SIMULATED = os.environ.get("LIGHTS_SIM") == "1" or "--sim" in sys.argv
+
+LED_FREQ_HZ = 800000
+LED_DMA = 10
+LED_BRIGHTNESS = 100
+LED_INVERT = False
+
+# WS2812 timing: one pixel on the wire at 800 kHz, and the latch gap after
+# the last one.
+LED_WIRE_TIME = 30e-6
+RESET_TIME = 50e-6
+
+
+def driver():
+    # The LED driver is imported on first use, so a renderer that only
+    # streams frames (LIGHTS_STREAM) runs on hosts without rpi_ws281x.
+    return importlib.import_module("SimStrip" if SIMULATED else "rpi_ws281x")
+
+
+def __getattr__(name):
+    if name in ("PixelStrip", "Color"):
+        return getattr(driver(), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def write(strip, colors, offset=0):
+    # Put packed colours into a strip's LED buffer from `offset` on.
+    # rpi_ws281x's slice assignment sets every LED of the slice to the one
+    # value it is given, so on the real driver the frame is copied into
+    # the channel's ws2811_led_t array, which holds the same 0xWWRRGGBB
+    # packing, with one memmove. Stand-in strips (topology channels,
+    # stream and shared-memory strips) take the whole array in load().
+    colors = np.ascontiguousarray(colors, dtype=np.uint32)
+    if hasattr(strip, "load"):
+        strip.load(colors, offset)
+    elif SIMULATED:
+        strip.getPixels()[offset:offset + len(colors)] = colors
+    else:
+        import _rpi_ws281x as ws
+        channel = strip._channel
+        if offset < 0 or offset + len(colors) > ws.ws2811_channel_t_count_get(channel):
+            raise IndexError(f"LEDs {offset}-{offset + len(colors)} are outside the strip")
+        # int() of the SWIG pointer is the address of the array.
+        leds = int(ws.ws2811_channel_t_leds_get(channel))
+        ctypes.memmove(leds + offset * colors.itemsize, colors.ctypes.data, colors.nbytes)
+
+
+def open_strips():
+    # Opens the physical strips listed in topology.json and returns the
+    # logical channels the effects draw into, one strip per channel.
+    layout = Topology.load()
+    strips = []
+    for out in layout.outputs:
+        strip = driver().PixelStrip(out.count, out.pin, LED_FREQ_HZ, LED_DMA,
+                           LED_INVERT, LED_BRIGHTNESS, out.channel)
+        strip.begin()
+        strips.append(strip)
+    return layout.connect(strips, write, LED_BRIGHTNESS)
@@ -0,0 +1,153 @@
+import numpy as np
+import json, os
+
+# How the logical canvas maps onto the physical strips. Effects draw into
+# the logical channels (s1, s2) once; each physical strip is a list of
+# segments that copy a run of one logical channel, optionally reversed, to
+# an offset on that strip. A strip can mirror a channel, join several
+# channels into one longer run, or leave LEDs dark; a channel no strip
+# reads is never packed or sent.
+TOPOLOGY = os.path.join(os.path.dirname(os.path.abspath(__file__)), "topology.json")
+
+# The tier modules draw LED_COUNT = 400 LEDs into each of s1 and s2, and
+# the cached renders are that wide, so the canvas has to match them.
+CANVAS_CHANNELS = 2
+CANVAS_COUNT = 400
+
+
+class StripMap:
+    # One physical strip: `index` holds, for every LED, its position in the
+    # flattened canvas; LEDs no segment covers point at a trailing black
+    # pixel.
+    def __init__(self, pin, channel, count, index):
+        self.pin = pin
+        self.channel = channel
+        self.count = count
+        self.index = index
+        self.sources = set()
+        self.strip = None
+        # Channels that have published since the strip was last shown, and
+        # whether any of them changed it.
+        self.published = set()
+        self.changed = False
+
+
+class Channel:
+    # Stands in for a PixelStrip as the target of one logical FrameBuffer.
+    # show() fans the channel out to every physical strip that reads it.
+    # A strip fed by several channels is written and shown once a frame,
+    # after all of them have published, so it never mixes two frames.
+    def __init__(self, layout, number, write, brightness):
+        self.layout = layout
+        self.write = write
+        self.number = number
+        self.colors = layout.canvas[number * layout.count:(number + 1) * layout.count]
+        self.outputs = [out for out in layout.outputs if number in out.sources]
+        self.used = bool(self.outputs)
+        self.brightness = brightness
+
+    def begin(self):
+        pass
+
+    def numPixels(self):
+        return self.layout.count
+
+    def setBrightness(self, brightness):
+        # A strip fed by several channels takes the last brightness set.
+        self.brightness = brightness
+        for out in self.outputs:
+            out.strip.setBrightness(brightness)
+
+    def getBrightness(self):
+        return self.brightness
+
+    def load(self, colors, offset=0):
+        self.colors[offset:offset + len(colors)] = colors
+
+    def show(self):
+        self.publish(changed=True)
+
+    def publish(self, changed=False):
+        # FrameBuffer calls this with changed=False for a frame it skipped,
+        # so a strip this channel shares is not left waiting for it.
+        for out in self.outputs:
+            out.published.add(self.number)
+            out.changed = out.changed or changed
+            if out.published == out.sources:
+                if out.changed:
+                    self.write(out.strip, self.layout.canvas[out.index])
+                    out.strip.show()
+                out.published.clear()
+                out.changed = False
+
+
+class Layout:
+    def __init__(self, channels, count, outputs):
+        self.channels = channels
+        self.count = count
+        self.outputs = outputs
+        # channels x count packed colours plus one black pixel.
+        self.canvas = np.zeros(channels * count + 1, dtype=np.uint32)
+
+    def direct(self, out):
+        # A strip that shows exactly one whole channel, in order, which no
+        # other strip reads: the channel can drive it without a copy.
+        if len(out.sources) != 1:
+            return False
+        source = next(iter(out.sources))
+        shared = sum(source in o.sources for o in self.outputs) > 1
+        identity = np.arange(source * self.count, (source + 1) * self.count)
+        return (not shared and out.count == self.count
+                and np.array_equal(out.index, identity))
+
+    def connect(self, strips, write, brightness=255):
+        # Returns one strip per logical channel for the FrameBuffers.
+        # Channels that map straight onto a strip get the PixelStrip itself;
+        # the others fan out to their strips with `write` (Strip.write).
+        for out, strip in zip(self.outputs, strips):
+            out.strip = strip
+        channels = []
+        for number in range(self.channels):
+            direct = [out for out in self.outputs if number in out.sources and self.direct(out)]
+            channels.append(direct[0].strip if direct else Channel(self, number, write, brightness))
+        return tuple(channels)
+
+
+def compile_segment(strip, spec, channels, count, index):
+    unknown = set(spec) - {"source", "start", "count", "offset", "reverse"}
+    if unknown:
+        raise ValueError(f"strip {strip}: segment has no field {', '.join(sorted(unknown))}")
+    source = spec.get("source", 0)
+    start = spec.get("start", 0)
+    length = spec.get("count", count - start)
+    offset = spec.get("offset", 0)
+    if not 0 <= source < channels:
+        raise ValueError(f"strip {strip}: no logical channel {source}")
+    if start < 0 or length <= 0 or start + length > count:
+        raise ValueError(f"strip {strip}: LEDs {start}-{start + length} are outside the canvas")
+    if offset < 0 or offset + length > len(index):
+        raise ValueError(f"strip {strip}: segment does not fit at offset {offset}")
+
+    run = np.arange(start, start + length) + source * count
+    index[offset:offset + length] = run[::-1] if spec.get("reverse", False) else run
+    return source
+
+
+def load(path=TOPOLOGY):
+    with open(path) as f:
+        data = json.load(f)
+
+    channels = data.get("channels", CANVAS_CHANNELS)
+    count = data.get("count", CANVAS_COUNT)
+    if channels != CANVAS_CHANNELS or count != CANVAS_COUNT:
+        raise ValueError(f"the effects draw {CANVAS_CHANNELS} channels of {CANVAS_COUNT} LEDs, "
+                         f"not {channels} of {count}")
+    outputs = []
+    for n, spec in enumerate(data["strips"]):
+        length = spec.get("count", count)
+        index = np.full(length, channels * count, dtype=np.intp)
+        out = StripMap(spec["pin"], spec.get("channel", n), length, index)
+        for seg in spec.get("segments", [{"source": n}]):
+            out.sources.add(compile_segment(n, seg, channels, count, index))
+        outputs.append(out)
+    return Layout(channels, count, outputs)
@@ -0,0 +1,102 @@
+from pythonosc.osc_message_builder import OscMessageBuilder
+from pythonosc.osc_bundle_builder import OscBundleBuilder
+from pythonosc.osc_message import OscMessage
+import socket
+import threading
+import time
+
+
+def build_message(address, *args):
+    # Times go out as 64-bit doubles; a 32-bit OSC float cannot hold an
+    # epoch timestamp to better than a few minutes.
+    builder = OscMessageBuilder(address=address)
+    for arg in args:
+        builder.add_arg(arg, arg_type="d" if isinstance(arg, float) else None)
+    return builder.build()
+
+
+class PiLink:
+    # Link to one light Pi over its OSC port. sync() estimates how far the
+    # Pi's wall clock is ahead of ours, NTP-style, and trigger() sends a
+    # bundle timetagged with the start time converted to the Pi's clock.
+    def __init__(self, name, ip, port):
+        self.name = name
+        self.target = (ip, port)
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.bind(("0.0.0.0", 0))
+        self.offset = 0.0
+        self.delay = None
+        self.seq = 0
+        self.reports = []
+        # sync() runs on a background thread; it and poll() both read the
+        # socket, so they take turns.
+        self.lock = threading.Lock()
+
+    def receive(self, timeout):
+        self.sock.settimeout(timeout)
+        try:
+            data, _ = self.sock.recvfrom(1024)
+        except OSError:
+            return None
+        msg = OscMessage(data)
+        if msg.address == "/sync/started":
+            self.reports.append(msg.params)
+        return msg
+
+    def sync(self, samples=5, timeout=0.1):
+        with self.lock:
+            return self.measure(samples, timeout)
+
+    def measure(self, samples, timeout):
+        # Keep the sample with the shortest round trip; its offset has the
+        # smallest error bound (delay / 2).
+        best = None
+        for _ in range(samples):
+            self.seq += 1
+            t1 = time.time()
+            self.sock.sendto(build_message("/sync/ping", self.seq, t1).dgram, self.target)
+
+            deadline = t1 + timeout
+            while time.time() < deadline:
+                msg = self.receive(max(0.001, deadline - time.time()))
+                if msg is None or msg.address != "/sync/pong" or msg.params[0] != self.seq:
+                    continue
+                t4 = time.time()
+                _, t1, t2, t3 = msg.params
+                delay = (t4 - t1) - (t3 - t2)
+                offset = ((t2 - t1) + (t3 - t4)) / 2
+                if best is None or delay < best[1]:
+                    best = (offset, delay)
+                break
+
+        if best is None:
+            print(f"[SYNC] Pi {self.name}: no reply, keeping offset {self.offset * 1000:+.1f} ms")
+            return False
+        self.offset, self.delay = best
+        return True
+
+    def trigger(self, address, start):
+        # `start` is in our clock; the Pi sees it in its own.
+        at = start + self.offset
+        bundle = OscBundleBuilder(at)
+        bundle.add_content(build_message(address, 1, at))
+        self.sock.sendto(bundle.build().dgram, self.target)
+
+    def prepare(self, address):
+        # Announce the tier the next trigger will start.
+        self.sock.sendto(build_message("/prepare", address).dgram, self.target)
+
+    def poll(self):
+        # Print the start reports (tier, seconds late) the Pi sent back.
+        # While a sync has the socket it collects them instead.
+        if not self.lock.acquire(blocking=False):
+            return
+        try:
+            while self.receive(0) is not None:
+                pass
+        finally:
+            self.lock.release()
+        for name, late in self.reports:
+            bound = "" if self.delay is None else f" (+/- {self.delay * 500:.1f} ms)"
+            print(f"[SYNC] Pi {self.name}: {name} started {late * 1000:+.1f} ms from target{bound}")
+        self.reports.clear()
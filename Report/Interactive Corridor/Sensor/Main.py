@@ -1,9 +1,10 @@
 from Phidget22.Devices.VoltageInput import VoltageInput
 import pygame
 import random
+import threading
 import time
 import sys
-from pythonosc.udp_client import SimpleUDPClient
+from ClockSync import PiLink
 
 PI_A_IP = "192.168.254.185"
 PI_A_PORT = 5679
@@ -14,50 +15,81 @@ PI_B_PORT = 5678
 PI_C_IP = "192.168.254.12"
 PI_C_PORT = 5677
 
-clientA = SimpleUDPClient(PI_A_IP, PI_A_PORT)
-clientB = SimpleUDPClient(PI_B_IP, PI_B_PORT)
-clientC = SimpleUDPClient(PI_C_IP, PI_C_PORT)
+PIS = [
+    PiLink("A", PI_A_IP, PI_A_PORT),
+    PiLink("B", PI_B_IP, PI_B_PORT),
+    PiLink("C", PI_C_IP, PI_C_PORT),
+]
+
+# Triggers name a start time this far ahead, so every Pi has the message
+# and its previous show stopped before frame 0 is due.
+START_LEAD = 0.25
+SYNC_INTERVAL = 30.0
+
+
+def sync_clocks():
+    for pi in PIS:
+        if pi.sync():
+            print(f"[SYNC] Pi {pi.name}: offset {pi.offset * 1000:+.1f} ms, "
+                  f"round trip {pi.delay * 1000:.1f} ms")
+
+
+sync_thread = None
+
+
+def start_sync():
+    # A Pi that does not answer holds sync() for samples x timeout (0.5 s),
+    # so the periodic sync runs on a thread and the loop keeps polling the
+    # sensors and starting audio on time.
+    global sync_thread
+    if sync_thread is None or not sync_thread.is_alive():
+        sync_thread = threading.Thread(target=sync_clocks, daemon=True)
+        sync_thread.start()
+
+
+def send_trigger(address):
+    start = time.time() + START_LEAD
+    for pi in PIS:
+        pi.trigger(address, start)
+    print(f"Sent: {address}")
+    return start
+
+
+def prepare_tier(address):
+    for pi in PIS:
+        pi.prepare(address)
+    print(f"Prepare: {address}")
 
 
 def run_python_1():
-    clientA.send_message("/run/python1", 1)
-    clientB.send_message("/run/python1", 1)
-    clientC.send_message("/run/python1", 1)
-    print("Sent: /run/python1")
+    return send_trigger("/run/python1")
 
 
 def run_python_2():
-    clientA.send_message("/run/python2", 1)
-    clientB.send_message("/run/python2", 1)
-    clientC.send_message("/run/python2", 1)
-    print("Sent: /run/python2")
+    return send_trigger("/run/python2")
 
 
 def run_python_3():
-    clientA.send_message("/run/python3", 1)
-    clientB.send_message("/run/python3", 1)
-    clientC.send_message("/run/python3", 1)
-    print("Sent: /run/python3")
+    return send_trigger("/run/python3")
 
 
 def run_python_4():
-    clientA.send_message("/run/python4", 1)
-    clientB.send_message("/run/python4", 1)
-    clientC.send_message("/run/python4", 1)
-    print("Sent: /run/python4")
+    return send_trigger("/run/python4")
 
 
 def run_python_5():
-    clientA.send_message("/run/python5", 1)
-    clientB.send_message("/run/python5", 1)
-    clientC.send_message("/run/python5", 1)
-    print("Sent: /run/python5")
+    return send_trigger("/run/python5")
 
 
 SIGNIFICANT_CHANGE = 0.05
 COOLDOWN_TIME = 100
 AUDIO_DELAY = 1.0
 
+# The next tier is drawn and announced this long after a trigger: after
+# the longest show (Epic, ~75 s) has finished, well before the cooldown
+# ends, so the Pis warm its frames while they are idle.
+PREPARE_AFTER = 80
+
 SENSOR_CONFIG = [
     {"serial": 85428, "channels": [0, 1, 2, 3, 5, 6]},
     {"serial": 85516, "channels": [0, 1, 2, 3]}
@@ -66,27 +98,27 @@ SENSOR_CONFIG = [
 
 def legendary_event():
     print("LEGENDARY event triggered!")
-    run_python_5()
+    return run_python_5()
 
 
 def epic_event():
     print("EPIC event triggered!")
-    run_python_4()
+    return run_python_4()
 
 
 def rare_event():
     print("RARE event triggered!")
-    run_python_3()
+    return run_python_3()
 
 
 def uncommon_event():
     print("UNCOMMON event triggered!")
-    run_python_2()
+    return run_python_2()
 
 
 def common_event():
     print("COMMON event triggered!")
-    run_python_1()
+    return run_python_1()
 
 
 EVENTS = [
@@ -97,6 +129,14 @@ EVENTS = [
     (0.40, common_event),
 ]
 
+EVENT_ADDRESS = {
+    legendary_event: "/run/python5",
+    epic_event: "/run/python4",
+    rare_event: "/run/python3",
+    uncommon_event: "/run/python2",
+    common_event: "/run/python1",
+}
+
 LEGENDARY_AUDIO = "/home/pi/EGL314JW/Legendary.wav"
 EPIC_AUDIO = "/home/pi/EGL314JW/Epic.wav"
 RARE_AUDIO = "/home/pi/EGL314JW/Rare.wav"
@@ -142,6 +182,8 @@ last_trigger_time = 0.0
 pending_sound = None
 pending_sound_time = 0.0
 
+next_event = None
+
 
 def init_sensors():
     global sensors, last_voltages
@@ -173,9 +215,7 @@ def cleanup():
             pass
 
 
-def weighted_random_event():
-    global pending_sound, pending_sound_time
-
+def draw_event():
     r = random.random()
     cumulative = 0.0
     chosen_fn = None
@@ -188,15 +228,34 @@ def weighted_random_event():
 
     if chosen_fn is None:
         chosen_fn = EVENTS[-1][1]
+    return chosen_fn
+
+
+def prepare_next_event():
+    global next_event
+
+    next_event = draw_event()
+    print(f"Next event: {next_event.__name__}")
+    prepare_tier(EVENT_ADDRESS[next_event])
+
+
+def weighted_random_event():
+    global pending_sound, pending_sound_time, next_event
+
+    # Normally drawn ahead by prepare_next_event(); a trigger that comes
+    # before that draws now.
+    chosen_fn = next_event or draw_event()
+    next_event = None
 
     print(f"Selected event: {chosen_fn.__name__}")
 
     chosen_sound = get_sound_for_event(chosen_fn)
 
-    chosen_fn()
+    start = chosen_fn()
 
+    # The audio keys off the same start time the lights do.
     pending_sound = chosen_sound
-    pending_sound_time = time.time() + AUDIO_DELAY
+    pending_sound_time = start + AUDIO_DELAY
 
 
 def main():
@@ -205,11 +264,23 @@ def main():
     print("Pi 1: Tiered Event System (Legendary / Epic / Rare / Uncommon / Common)")
     print(f"Audio delay: {AUDIO_DELAY} seconds")
     init_sensors()
+    sync_clocks()
+    last_sync = time.time()
 
     try:
         while True:
             now = time.time()
 
+            for pi in PIS:
+                pi.poll()
+
+            if now - last_sync > SYNC_INTERVAL:
+                start_sync()
+                last_sync = now
+
+            if next_event is None and now - last_trigger_time > PREPARE_AFTER:
+                prepare_next_event()
+
             if pending_sound is not None and now >= pending_sound_time:
                 AUDIO_CHANNEL.stop()
                 AUDIO_CHANNEL.play(pending_sound)